@@ -2,6 +2,7 @@
 from __future__ import absolute_import
 import numpy as np
 from . import linear_assignment
+from .track import batch_to_ltwh
 
 
 def iou(bbox, candidates):
@@ -43,6 +44,41 @@ def iou(bbox, candidates):
     return area_intersection / (area_bbox + area_candidates - area_intersection)
 
 
+def iou_matrix(bboxes, candidates):
+    """Compute pair-wise intersection over union.
+
+    Parameters
+    ----------
+    bboxes : ndarray
+        An Nx4 matrix of bounding boxes in format `(top left x, top left y,
+        width, height)`.
+    candidates : ndarray
+        An Mx4 matrix of candidate bounding boxes in the same format as
+        `bboxes`.
+
+    Returns
+    -------
+    ndarray
+        Returns a matrix of size len(bboxes), len(candidates) such that element
+        (i, j) is `iou(bboxes[i], candidates)[j]`.
+
+    """
+    bboxes_tl, bboxes_br = bboxes[:, :2], bboxes[:, :2] + bboxes[:, 2:]
+    candidates_tl = candidates[:, :2]
+    candidates_br = candidates[:, :2] + candidates[:, 2:]
+
+    tl = np.maximum(bboxes_tl[:, np.newaxis], candidates_tl[np.newaxis])
+    br = np.minimum(bboxes_br[:, np.newaxis], candidates_br[np.newaxis])
+    wh = np.maximum(0.0, br - tl)
+
+    area_intersection = wh.prod(axis=2)
+    area_bboxes = bboxes[:, 2:].prod(axis=1)
+    area_candidates = candidates[:, 2:].prod(axis=1)
+    return area_intersection / (
+        area_bboxes[:, np.newaxis] + area_candidates[np.newaxis] - area_intersection
+    )
+
+
 def iou_cost(tracks, detections, track_indices=None, detection_indices=None):
     """An intersection over union distance metric.
 
@@ -73,13 +109,12 @@ def iou_cost(tracks, detections, track_indices=None, detection_indices=None):
         detection_indices = np.arange(len(detections))
 
     cost_matrix = np.zeros((len(track_indices), len(detection_indices)))
+    if len(track_indices) == 0 or len(detection_indices) == 0:
+        return cost_matrix
+    bboxes = batch_to_ltwh([tracks[i] for i in track_indices])
     candidates = np.asarray([detections[i].ltwh for i in detection_indices])
 
-    for row, track_idx in enumerate(track_indices):
-        if tracks[track_idx].time_since_update > 1:
-            cost_matrix[row, :] = linear_assignment.INFTY_COST
-            continue
-
-        bbox = tracks[track_idx].to_ltwh()
-        cost_matrix[row, :] = 1.0 - iou(bbox, candidates)
+    cost_matrix[:] = 1.0 - iou_matrix(bboxes, candidates)
+    stale = [tracks[i].time_since_update > 1 for i in track_indices]
+    cost_matrix[stale] = linear_assignment.INFTY_COST
     return cost_matrix
@@ -36,16 +36,25 @@ class KalmanFilter(object):
     (x, y, a, h) is taken as direct observation of the state space (linear
     observation model).
 
+    Parameters
+    ----------
+    dtype : Optional[numpy.dtype]
+        Floating point type of the filter matrices and of the states created
+        by `initiate`. Defaults to float32, which is plenty for bounding boxes
+        in pixel space and halves the memory traffic of the filter steps.
+
     """
 
-    def __init__(self):
+    def __init__(self, dtype=np.float32):
         ndim, dt = 4, 1.0
+        self._ndim = ndim
+        self._dtype = dtype
 
         # Create Kalman filter model matrices.
-        self._motion_mat = np.eye(2 * ndim, 2 * ndim)
+        self._motion_mat = np.eye(2 * ndim, 2 * ndim, dtype=dtype)
         for i in range(ndim):
             self._motion_mat[i, ndim + i] = dt
-        self._update_mat = np.eye(ndim, 2 * ndim)
+        self._update_mat = np.eye(ndim, 2 * ndim, dtype=dtype)
 
         # Motion and observation uncertainty are chosen relative to the current
         # state estimate. These weights control the amount of uncertainty in
@@ -72,7 +81,7 @@ class KalmanFilter(object):
         """
         mean_pos = measurement
         mean_vel = np.zeros_like(mean_pos)
-        mean = np.r_[mean_pos, mean_vel]
+        mean = np.r_[mean_pos, mean_vel].astype(self._dtype, copy=False)
 
         std = [
             2 * self._std_weight_position * measurement[3],
@@ -84,7 +93,7 @@ class KalmanFilter(object):
             1e-5,
             10 * self._std_weight_velocity * measurement[3],
         ]
-        covariance = np.diag(np.square(std))
+        covariance = np.diag(np.square(np.asarray(std, dtype=self._dtype)))
         return mean, covariance
 
     def predict(self, mean, covariance):
@@ -118,7 +127,9 @@ class KalmanFilter(object):
             1e-5,
             self._std_weight_velocity * mean[3],
         ]
-        motion_cov = np.diag(np.square(np.r_[std_pos, std_vel]))
+        motion_cov = np.diag(
+            np.square(np.asarray(std_pos + std_vel, dtype=self._dtype))
+        )
 
         mean = np.dot(self._motion_mat, mean)
         covariance = (
@@ -128,6 +139,52 @@ class KalmanFilter(object):
 
         return mean, covariance
 
+    def multi_predict(self, mean, covariance):
+        """Run Kalman filter prediction step for several states at once.
+
+        Parameters
+        ----------
+        mean : ndarray
+            The Nx8 dimensional matrix of the mean vectors of the object states
+            at the previous time step.
+        covariance : ndarray
+            The Nx8x8 dimensional array of the covariance matrices of the object
+            states at the previous time step.
+
+        Returns
+        -------
+        (ndarray, ndarray)
+            Returns the mean vectors and covariance matrices of the predicted
+            states, as in `predict`.
+
+        """
+        height = mean[:, 3]
+        std_pos = self._std_weight_position * height
+        std_vel = self._std_weight_velocity * height
+        std = np.stack(
+            [
+                std_pos,
+                std_pos,
+                np.full_like(height, 1e-2),
+                std_pos,
+                std_vel,
+                std_vel,
+                np.full_like(height, 1e-5),
+                std_vel,
+            ],
+            axis=1,
+        )
+
+        mean = np.dot(mean, self._motion_mat.T)
+        covariance = np.matmul(
+            np.matmul(self._motion_mat, covariance), self._motion_mat.T
+        )
+        # add the per-state diagonal motion noise in place
+        diag = np.arange(mean.shape[1])
+        covariance[:, diag, diag] += np.square(std)
+
+        return mean, covariance
+
     def project(self, mean, covariance):
         """Project state distribution to measurement space.
 
@@ -151,15 +208,40 @@ class KalmanFilter(object):
             1e-1,
             self._std_weight_position * mean[3],
         ]
-        innovation_cov = np.diag(np.square(std))
+        innovation_cov = np.diag(np.square(np.asarray(std, dtype=self._dtype)))
 
-        mean = np.dot(self._update_mat, mean)
-        covariance = np.linalg.multi_dot(
-            (self._update_mat, covariance, self._update_mat.T)
-        )
+        # `_update_mat` selects the first `ndim` entries of the state, so the
+        # projection reduces to slicing the state distribution
+        ndim = self._ndim
+        mean = mean[:ndim].copy()
+        covariance = covariance[:ndim, :ndim]
         return mean, covariance + innovation_cov
 
-    def update(self, mean, covariance, measurement):
+    def project_cholesky(self, mean, covariance):
+        """Project state distribution to measurement space and factorize the
+        projected covariance.
+
+        Parameters
+        ----------
+        mean : ndarray
+            The state's mean vector (8 dimensional array).
+        covariance : ndarray
+            The state's covariance matrix (8x8 dimensional).
+
+        Returns
+        -------
+        (ndarray, ndarray, ndarray)
+            Returns the projected mean and covariance matrix of the given state
+            estimate, and the lower triangular Cholesky factor of the projected
+            covariance. Can be passed as `projection` to `update` and
+            `gating_distance`.
+
+        """
+        mean, covariance = self.project(mean, covariance)
+        cholesky_factor = np.linalg.cholesky(covariance)
+        return mean, covariance, cholesky_factor
+
+    def update(self, mean, covariance, measurement, projection=None):
         """Run Kalman filter correction step.
 
         Parameters
@@ -172,6 +254,9 @@ class KalmanFilter(object):
             The 4 dimensional measurement vector (x, y, a, h), where (x, y)
             is the center position, a the aspect ratio, and h the height of the
             bounding box.
+        projection : Optional[(ndarray, ndarray, ndarray)]
+            The output of `project_cholesky` for this state, if already
+            computed.
 
         Returns
         -------
@@ -179,25 +264,27 @@ class KalmanFilter(object):
             Returns the measurement-corrected state distribution.
 
         """
-        projected_mean, projected_cov = self.project(mean, covariance)
+        if projection is None:
+            projection = self.project_cholesky(mean, covariance)
+        projected_mean, projected_cov, chol_factor = projection
 
-        chol_factor, lower = scipy.linalg.cho_factor(
-            projected_cov, lower=True, check_finite=False
-        )
+        # covariance[:, :ndim] is np.dot(covariance, self._update_mat.T)
         kalman_gain = scipy.linalg.cho_solve(
-            (chol_factor, lower),
-            np.dot(covariance, self._update_mat.T).T,
+            (chol_factor, True),
+            covariance[:, : self._ndim].T,
             check_finite=False,
         ).T
         innovation = measurement - projected_mean
 
         new_mean = mean + np.dot(innovation, kalman_gain.T)
-        new_covariance = covariance - np.linalg.multi_dot(
-            (kalman_gain, projected_cov, kalman_gain.T)
+        new_covariance = covariance - np.dot(
+            kalman_gain, np.dot(projected_cov, kalman_gain.T)
         )
         return new_mean, new_covariance
 
-    def gating_distance(self, mean, covariance, measurements, only_position=False):
+    def gating_distance(
+        self, mean, covariance, measurements, only_position=False, projection=None
+    ):
         """Compute gating distance between state distribution and measurements.
 
         A suitable distance threshold can be obtained from `chi2inv95`. If
@@ -217,6 +304,9 @@ class KalmanFilter(object):
         only_position : Optional[bool]
             If True, distance computation is done with respect to the bounding
             box center position only.
+        projection : Optional[(ndarray, ndarray, ndarray)]
+            The output of `project_cholesky` for this state, if already
+            computed.
 
         Returns
         -------
@@ -226,12 +316,15 @@ class KalmanFilter(object):
             `measurements[i]`.
 
         """
-        mean, covariance = self.project(mean, covariance)
+        if projection is None:
+            projection = self.project_cholesky(mean, covariance)
+        mean, _, cholesky_factor = projection
         if only_position:
-            mean, covariance = mean[:2], covariance[:2, :2]
+            # the Cholesky factor of the leading 2x2 block of the covariance
+            # is the leading 2x2 block of its Cholesky factor
+            mean, cholesky_factor = mean[:2], cholesky_factor[:2, :2]
             measurements = measurements[:, :2]
 
-        cholesky_factor = np.linalg.cholesky(covariance)
         d = measurements - mean
         z = scipy.linalg.solve_triangular(
             cholesky_factor, d.T, lower=True, check_finite=False, overwrite_b=True
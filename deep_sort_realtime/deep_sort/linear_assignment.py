@@ -207,7 +207,11 @@ def gate_cost_matrix(
     for row, track_idx in enumerate(track_indices):
         track = tracks[track_idx]
         gating_distance = kf.gating_distance(
-            track.mean, track.covariance, measurements, only_position
+            track.mean,
+            track.covariance,
+            measurements,
+            only_position,
+            projection=track.project(kf),
         )
         cost_matrix[row, gating_distance > gating_threshold] = gated_cost
     return cost_matrix
@@ -2,6 +2,111 @@
 
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Default number of latest detection centers kept in a track's trajectory.
+DEFAULT_MAX_TRAJECTORY_LEN = 64
+# Initial number of trajectory points preallocated per track when the
+# trajectory is unbounded, grown on demand.
+_TRAJECTORY_INIT_CAPACITY = 32
+# Initial number of features preallocated per track, grown on demand.
+_FEATURES_INIT_CAPACITY = 8
+
+# Track states as plain module-level ints, see `TrackState`.
+TENTATIVE = 1
+CONFIRMED = 2
+DELETED = 3
+
+
+def _velocity_numpy(trajectory, fps):
+    # calculate the velocity as discrete different (x[t+1] - x[t]) * fps
+    velocity = np.diff(trajectory, axis=0)
+    velocity *= fps
+    # calculate the velocity magnitude
+    velocity_magnitude = np.einsum("ij,ij->i", velocity, velocity)[:, None]
+    np.sqrt(velocity_magnitude, out=velocity_magnitude)
+    # reduce the velocity to the mean velocity, as a Python float like the
+    # compiled `_velocity_loop`
+    average_velocity = float(np.mean(velocity_magnitude))
+    # calculate the velocity as unit direction vector, reusing the velocity buffer
+    velocity_direction = np.divide(velocity, velocity_magnitude + 1e-8, out=velocity)
+    # return velocity, velocity magnitude and direction
+    return average_velocity, velocity_magnitude, velocity_direction
+
+
+def _velocity_loop(trajectory, fps):
+    # same as `_velocity_numpy` in a single pass, meant to be compiled by numba
+    n = trajectory.shape[0] - 1
+    velocity_magnitude = np.empty((n, 1), dtype=trajectory.dtype)
+    velocity_direction = np.empty((n, 2), dtype=trajectory.dtype)
+    total = 0.0
+    for i in range(n):
+        vx = (trajectory[i + 1, 0] - trajectory[i, 0]) * fps
+        vy = (trajectory[i + 1, 1] - trajectory[i, 1]) * fps
+        magnitude = np.sqrt(vx * vx + vy * vy)
+        velocity_magnitude[i, 0] = magnitude
+        velocity_direction[i, 0] = vx / (magnitude + 1e-8)
+        velocity_direction[i, 1] = vy / (magnitude + 1e-8)
+        total += magnitude
+    return float(total) / n, velocity_magnitude, velocity_direction
+
+
+if njit is None:
+    _velocity = _velocity_numpy
+else:
+    _velocity = njit(cache=True, fastmath=True)(_velocity_loop)
+
+
+def batch_to_ltwh(tracks):
+    """Get the KF-predicted bounding boxes of several tracks at once, in
+    format `(top left x, top left y, width, height)`.
+
+    Parameters
+    ----------
+    tracks : List[Track]
+        The tracks.
+
+    Returns
+    -------
+    ndarray
+        An Nx4 matrix whose i-th row is `tracks[i].to_ltwh()`, in the dtype
+        of the tracks' means. If `tracks` is empty, the empty matrix is
+        float32, the default `KalmanFilter` dtype, as there is no track to
+        take the dtype from.
+
+    """
+    if len(tracks) == 0:
+        return np.empty((0, 4), dtype=np.float32)
+    ret = np.array([track.mean[:4] for track in tracks])
+    ret[:, 2] *= ret[:, 3]
+    ret[:, :2] -= ret[:, 2:] / 2
+    return ret
+
+
+def batch_to_ltrb(tracks):
+    """Get the KF-predicted bounding boxes of several tracks at once, in
+    format `(min x, min y, max x, max y)`.
+
+    Parameters
+    ----------
+    tracks : List[Track]
+        The tracks.
+
+    Returns
+    -------
+    ndarray
+        An Nx4 matrix whose i-th row is `tracks[i].to_ltrb()`, with the same
+        dtype as `batch_to_ltwh`.
+
+    """
+    ret = batch_to_ltwh(tracks)
+    ret[:, 2:] += ret[:, :2]
+    return ret
+
+
 class TrackState:
     """
     Enumeration type for the single target track state. Newly created tracks are
@@ -12,9 +117,9 @@ class TrackState:
 
     """
 
-    Tentative = 1
-    Confirmed = 2
-    Deleted = 3
+    Tentative = TENTATIVE
+    Confirmed = CONFIRMED
+    Deleted = DELETED
 
 
 class Track:
@@ -51,6 +156,10 @@ class Track:
         Instance mask associated with matched detection
     others : Optional any
         Any supplementary fields related to matched detection
+    max_trajectory_len : Optional[int]
+        Only the latest `max_trajectory_len` detection centers are kept in the
+        `trajectory`, must be at least 2. If None, the whole trajectory is
+        kept. Defaults to 64.
 
     Attributes
     ----------
@@ -66,14 +175,42 @@ class Track:
         Total number of frames since first occurrence.
     time_since_update : int
         Total number of frames since last measurement update.
-    state : TrackState
-        The current track state.
-    features : List[ndarray]
-        A cache of features. On each measurement update, the associated feature
-        vector is added to this list.
+    state : int
+        The current track state, one of the `TrackState` values.
+    features : ndarray
+        A cache of features, oldest first. On each measurement update, the
+        associated feature vector is added to this cache.
+    trajectory : ndarray
+        An Nx2 array of the centers of the latest detections matched to this
+        track, oldest first.
 
     """
 
+    __slots__ = (
+        "mean",
+        "covariance",
+        "_projection",
+        "track_id",
+        "hits",
+        "age",
+        "time_since_update",
+        "state",
+        "_features",
+        "_feat_head",
+        "latest_feature",
+        "_n_init",
+        "_max_age",
+        "original_ltwh",
+        "det_class",
+        "det_conf",
+        "instance_mask",
+        "others",
+        "_max_trajectory_len",
+        "_trajectory",
+        "_first_center",
+        "_traj_len",
+    )
+
     def __init__(
         self,
         mean,
@@ -87,21 +224,27 @@ class Track:
         det_conf=None,
         instance_mask=None,
         others=None,
+        max_trajectory_len=DEFAULT_MAX_TRAJECTORY_LEN,
     ):
         self.mean = mean
         self.covariance = covariance
+        # measurement space projection of the state as a tuple
+        # (mean, covariance, projection), see `project`
+        self._projection = None
         self.track_id = track_id
         self.hits = 1
         self.age = 1
         self.time_since_update = 0
 
-        self.state = TrackState.Tentative
-        self.features = []
+        self.state = TENTATIVE
+        # features are kept in a buffer allocated on the first update. Until
+        # then, the only cached feature is `latest_feature`.
+        self._features = None
+        self._feat_head = 0
         self.latest_feature = None
         if feature is not None:
-            self.features.append(feature)
             self.latest_feature = feature
-
+            self._feat_head = 1
 
         self._n_init = n_init
         self._max_age = max_age
@@ -111,16 +254,146 @@ class Track:
         self.det_conf = det_conf
         self.instance_mask = instance_mask
         self.others = others
-        # add a list to append trajectories in
-        self.trajectory = []
+        # buffer of detection centers, allocated on the second center. If
+        # bounded, it is a ring buffer of `2 * max_trajectory_len` rows where
+        # every center is written twice, `max_trajectory_len` rows apart, so
+        # that the latest `max_trajectory_len` centers are always a contiguous
+        # view. `_traj_len` counts all centers appended so far.
+        self._trajectory = None
+        self._first_center = None
+        self._traj_len = 0
+        self.max_trajectory_len = max_trajectory_len
         # append the current detection center to trajectory
         if original_ltwh is not None:
-            self.trajectory.append(self.to_center())
+            self._append_center(original_ltwh)
+
+    @property
+    def features(self):
+        """ndarray: Features cached since the cache was last reset, oldest first."""
+        if self._features is None:
+            if self._feat_head == 0:
+                return np.empty((0,), dtype=np.float32)
+            self._allocate_features()
+        return self._features[: self._feat_head]
+
+    @features.setter
+    def features(self, features):
+        self._feat_head = 0
+        for feature in features:
+            self._append_feature(feature)
+
+    def _allocate_features(self, feature=None):
+        # allocate the features buffer, moving in the pending initial feature
+        if self._feat_head:
+            feature = self.latest_feature
+        feature = np.asarray(feature)
+        self._features = np.empty(
+            (_FEATURES_INIT_CAPACITY,) + feature.shape, dtype=feature.dtype
+        )
+        if self._feat_head:
+            self._features[0] = feature
+
+    def _append_feature(self, feature):
+        if self._features is None:
+            self._allocate_features(feature)
+        elif self._feat_head == len(self._features):
+            grown = np.empty(
+                (2 * len(self._features),) + self._features.shape[1:],
+                dtype=self._features.dtype,
+            )
+            grown[: self._feat_head] = self._features
+            self._features = grown
+        self._features[self._feat_head] = feature
+        self._feat_head += 1
+
+    @property
+    def max_trajectory_len(self):
+        """Optional[int]: Number of latest detection centers kept in the
+        trajectory, or None if the whole trajectory is kept."""
+        return self._max_trajectory_len
+
+    @max_trajectory_len.setter
+    def max_trajectory_len(self, max_trajectory_len):
+        if max_trajectory_len is not None and max_trajectory_len < 2:
+            raise ValueError("max_trajectory_len must be None or at least 2")
+        if self._trajectory is None:
+            # no buffer laid out yet, at most the pending first center is kept
+            self._max_trajectory_len = max_trajectory_len
+            return
+        trajectory = self.trajectory.copy()
+        self._max_trajectory_len = max_trajectory_len
+        self.trajectory = trajectory
+
+    @property
+    def trajectory(self):
+        """ndarray: Nx2 view of the detection centers associated with the track."""
+        if self._trajectory is None:
+            if self._traj_len == 0:
+                return np.empty((0, 2), dtype=np.float32)
+            self._allocate_trajectory()
+        max_len = self._max_trajectory_len
+        if max_len is None or self._traj_len <= max_len:
+            return self._trajectory[: self._traj_len]
+        start = self._traj_len % max_len
+        return self._trajectory[start : start + max_len]
+
+    @trajectory.setter
+    def trajectory(self, trajectory):
+        self._trajectory = None
+        self._first_center = None
+        self._traj_len = 0
+        for center_x, center_y in trajectory:
+            self._append_point(center_x, center_y)
+
+    def _allocate_trajectory(self):
+        # allocate the trajectory buffer, moving in the pending first center
+        max_len = self._max_trajectory_len
+        if max_len is None:
+            self._trajectory = np.empty(
+                (_TRAJECTORY_INIT_CAPACITY, 2), dtype=np.float32
+            )
+        else:
+            self._trajectory = np.empty((2 * max_len, 2), dtype=np.float32)
+            self._trajectory[max_len] = self._first_center
+        self._trajectory[0] = self._first_center
+
+    def _append_center(self, ltwh):
+        # same center as `to_center`, kept as scalars
+        left, top, w, h = ltwh
+        center_x = left + w // 2
+        center_y = top + h // 2
+        self._append_point(center_x, center_y)
+
+    def _append_point(self, center_x, center_y):
+        if self._traj_len == 0:
+            # a lot of tracks never get a second detection, hold off allocating
+            self._first_center = (center_x, center_y)
+            self._traj_len = 1
+            return
+        if self._trajectory is None:
+            self._allocate_trajectory()
+        max_len = self._max_trajectory_len
+        if max_len is None:
+            if self._traj_len == len(self._trajectory):
+                grown = np.empty(
+                    (2 * len(self._trajectory), 2), dtype=self._trajectory.dtype
+                )
+                grown[: self._traj_len] = self._trajectory
+                self._trajectory = grown
+            row = self._trajectory[self._traj_len]
+            row[0] = center_x
+            row[1] = center_y
+        else:
+            idx = self._traj_len % max_len
+            row, mirror = self._trajectory[idx], self._trajectory[idx + max_len]
+            row[0] = mirror[0] = center_x
+            row[1] = mirror[1] = center_y
+        self._traj_len += 1
 
     def to_center(self):
-        ret = self.original_ltwh.copy()
-        ret[:2] += ret[2:] // 2
-        return ret[:2]    
+        """Get the center `(x, y)` of the detection matched this round."""
+        left, top, w, h = self.original_ltwh
+        return np.array([left + w // 2, top + h // 2])
 
     def to_tlwh(self, orig=False, orig_strict=False):
         """Get current position in bounding box format `(top left x, top left y,
@@ -160,10 +433,9 @@ class Track:
             else:
                 return self.original_ltwh.copy()
 
-        ret = self.mean[:4].copy()
-        ret[2] *= ret[3]
-        ret[:2] -= ret[2:] / 2
-        return ret
+        x, y, a, h = self.mean[:4]
+        w = a * h
+        return np.array([x - w / 2, y - h / 2, w, h], dtype=self.mean.dtype)
 
     def to_tlbr(self, orig=False, orig_strict=False):
         """Get current position in bounding box format `(min x, miny, max x,
@@ -192,10 +464,19 @@ class Track:
             The KF-predicted bounding box by default.
             If `orig` is True and track is matched to a detection this round, then the original det is returned.
         """
-        ret = self.to_ltwh(orig=orig, orig_strict=orig_strict)
-        if ret is not None:
-            ret[2:] = ret[:2] + ret[2:]
-        return ret
+        if orig:
+            if self.original_ltwh is None:
+                if orig_strict:
+                    return None
+                # else if not orig_strict, return kalman means below
+            else:
+                left, top, w, h = self.original_ltwh
+                return np.array([left, top, left + w, top + h])
+
+        x, y, a, h = self.mean[:4]
+        w = a * h
+        left, top = x - w / 2, y - h / 2
+        return np.array([left, top, left + w, top + h], dtype=self.mean.dtype)
 
     def get_det_conf(self):
         """
@@ -237,41 +518,26 @@ class Track:
         """
         Get velocity info of the track.
         """
+        trajectory = self.trajectory
         # If the trajectory only has one element, we cannot get its velocity
-        if len(self.trajectory) < 2:
+        if len(trajectory) < 2:
             return None, None, None
-        # convert trajectory from list to array
-        trajectory_array = np.asarray(self.trajectory)
-        # calculate the velocity as discrete different (x[t+1] - x[t]) * fps
-        velocity = (trajectory_array[1:] - trajectory_array[:-1]) * fps
-        # calculate the velocity magnitude
-        velocity_magnitude = np.sqrt(np.sum(velocity ** 2, axis=-1, keepdims=True))
-        # calculate the velocity as unit direction vector
-        velocity_direction = velocity / (velocity_magnitude + 1e-8)
-        # reduce the velocity to the mean velocity
-        average_velocity = np.mean(velocity_magnitude)
-        # return velocity, velocity magnitude and direction
-        return average_velocity, velocity_magnitude, velocity_direction
+        return _velocity(trajectory, fps)
 
     def get_trajectory_slope(self):
         """
         Get trajectory slope info of the track.
         """
+        trajectory = self.trajectory
         # If the trajectory only has one element, we cannot get its velocity
-        if len(self.trajectory) < 2:
+        if len(trajectory) < 2:
             return None
-        else:
-            # convert trajectory from list to array
-            trajectory_array = np.asarray(self.trajectory)
-            # calculate the difference in y-direction
-            diff_y = trajectory_array[-1, 1] - trajectory_array[0, 1]
-            # calculate the difference in x-direction with a small value
-            # added to avoid division by zero
-            diff_x = trajectory_array[-1, 0] - trajectory_array[0, 0] + 1e-07
-            # calculate the slope
-            slope = diff_y / diff_x
-            # return the calculated slope
-            return slope
+        # only the first and last centers are needed, as Python floats
+        first_x, first_y = trajectory[0].tolist()
+        last_x, last_y = trajectory[-1].tolist()
+        # calculate the slope, with a small value added to the difference in
+        # x-direction to avoid division by zero
+        return (last_y - first_y) / (last_x - first_x + 1e-07)
 
     def predict(self, kf):
         """Propagate the state distribution to the current time step using a
@@ -284,6 +550,34 @@ class Track:
 
         """
         self.mean, self.covariance = kf.predict(self.mean, self.covariance)
+        self._step()
+
+    @staticmethod
+    def predict_batch(tracks, kf):
+        """Propagate the state distributions of several tracks to the current
+        time step using a single batched Kalman filter prediction step. This is
+        equivalent to calling `predict` on each of the tracks.
+
+        Parameters
+        ----------
+        tracks : List[Track]
+            The tracks to propagate.
+        kf : kalman_filter.KalmanFilter
+            The Kalman filter.
+
+        """
+        if len(tracks) == 0:
+            return
+        means, covariances = kf.multi_predict(
+            np.stack([track.mean for track in tracks]),
+            np.stack([track.covariance for track in tracks]),
+        )
+        for track, mean, covariance in zip(tracks, means, covariances):
+            track.mean, track.covariance = mean, covariance
+            track._step()
+
+    def _step(self):
+        # bookkeeping shared by `predict` and `predict_batch`
         self.age += 1
         self.time_since_update += 1
         self.original_ltwh = None
@@ -291,6 +585,34 @@ class Track:
         self.instance_mask = None
         self.others = None
 
+    def project(self, kf):
+        """Project the state distribution to measurement space. The result is
+        cached for as long as `mean` and `covariance` are the same objects, so
+        gating and the measurement update share a single Cholesky
+        factorization.
+
+        Parameters
+        ----------
+        kf : kalman_filter.KalmanFilter
+            The Kalman filter.
+
+        Returns
+        -------
+        (ndarray, ndarray, ndarray)
+            The projected mean, covariance and the Cholesky factor of the
+            projected covariance, see `KalmanFilter.project_cholesky`.
+
+        """
+        cached = self._projection
+        if (
+            cached is None
+            or cached[0] is not self.mean
+            or cached[1] is not self.covariance
+        ):
+            projection = kf.project_cholesky(self.mean, self.covariance)
+            cached = self._projection = (self.mean, self.covariance, projection)
+        return cached[2]
+
     def update(self, kf, detection):
         """Perform Kalman filter measurement update step and update the feature
         cache.
@@ -305,37 +627,39 @@ class Track:
         """
         self.original_ltwh = detection.get_ltwh()
         self.mean, self.covariance = kf.update(
-            self.mean, self.covariance, detection.to_xyah()
+            self.mean,
+            self.covariance,
+            detection.to_xyah(),
+            projection=self.project(kf),
         )
-        self.features.append(detection.feature)
-        self.latest_feature = detection.feature
+        feature = detection.feature
+        self._append_feature(feature)
+        self.latest_feature = feature
         self.det_conf = detection.confidence
         self.det_class = detection.class_name
         self.instance_mask = detection.instance_mask
         self.others = detection.others
-        self.trajectory.append(self.to_center())
+        self._append_center(self.original_ltwh)
 
         self.hits += 1
 
         self.time_since_update = 0
-        if self.state == TrackState.Tentative and self.hits >= self._n_init:
-            self.state = TrackState.Confirmed
+        if self.state == TENTATIVE and self.hits >= self._n_init:
+            self.state = CONFIRMED
 
     def mark_missed(self):
         """Mark this track as missed (no association at the current time step)."""
-        if self.state == TrackState.Tentative:
-            self.state = TrackState.Deleted
-        elif self.time_since_update > self._max_age:
-            self.state = TrackState.Deleted
+        if self.state == TENTATIVE or self.time_since_update > self._max_age:
+            self.state = DELETED
 
     def is_tentative(self):
         """Returns True if this track is tentative (unconfirmed)."""
-        return self.state == TrackState.Tentative
+        return self.state == TENTATIVE
 
     def is_confirmed(self):
         """Returns True if this track is confirmed."""
-        return self.state == TrackState.Confirmed
+        return self.state == CONFIRMED
 
     def is_deleted(self):
         """Returns True if this track is dead and should be deleted."""
-        return self.state == TrackState.Deleted
+        return self.state == DELETED
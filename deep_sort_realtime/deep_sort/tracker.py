@@ -5,7 +5,7 @@ import numpy as np
 from . import kalman_filter
 from . import linear_assignment
 from . import iou_matching
-from .track import Track
+from .track import Track, DEFAULT_MAX_TRAJECTORY_LEN
 
 
 class Tracker:
@@ -24,6 +24,11 @@ class Tracker:
         `n_init` frames.
     today: Optional[datetime.date]
             Provide today's date, for naming of tracks
+    max_trajectory_len : Optional[int]
+        Number of latest detection centers kept in each track's trajectory,
+        at least 2. If None, whole trajectories are kept. Defaults to 64. It
+        is set on every new track after construction, so overriding track
+        classes do not need to accept it in their `__init__`.
 
     Attributes
     ----------
@@ -50,6 +55,7 @@ class Tracker:
         override_track_class=None,
         today=None,
         gating_only_position=False,
+        max_trajectory_len=DEFAULT_MAX_TRAJECTORY_LEN,
     ):
         self.today = today
         self.metric = metric
@@ -57,6 +63,9 @@ class Tracker:
         self.max_age = max_age
         self.n_init = n_init
         self.gating_only_position = gating_only_position
+        if max_trajectory_len is not None and max_trajectory_len < 2:
+            raise ValueError("max_trajectory_len must be None or at least 2")
+        self.max_trajectory_len = max_trajectory_len
 
         self.kf = kalman_filter.KalmanFilter()
         self.tracks = []
@@ -72,8 +81,12 @@ class Tracker:
 
         This function should be called once every time step, before `update`.
         """
-        for track in self.tracks:
-            track.predict(self.kf)
+        if self.track_class.predict is Track.predict:
+            self.track_class.predict_batch(self.tracks, self.kf)
+        else:
+            # respect track classes that override `predict`
+            for track in self.tracks:
+                track.predict(self.kf)
 
     def update(self, detections, today=None):
         """Perform measurement update and track management.
@@ -119,16 +132,24 @@ class Tracker:
         for track in self.tracks:
             if not track.is_confirmed():
                 continue
-            features += track.features
-            targets += [track.track_id for _ in track.features]
+            track_features = track.features
+            if len(track_features) == 0:
+                continue
+            features.append(track_features)
+            targets += [track.track_id] * len(track_features)
             track.features = []
-        self.metric.partial_fit(
-            np.asarray(features), np.asarray(targets), active_targets
-        )
+        # concatenate copies the features out of the track buffers, which are
+        # reused for the next updates
+        features = np.concatenate(features) if features else np.empty((0,))
+        self.metric.partial_fit(features, np.asarray(targets), active_targets)
 
     def _match(self, detections):
+        # stack the detection features once, the cascade queries subsets of
+        # them at every level
+        det_features = np.array([d.feature for d in detections])
+
         def gated_metric(tracks, dets, track_indices, detection_indices):
-            features = np.array([dets[i].feature for i in detection_indices])
+            features = det_features[detection_indices]
             targets = np.array([tracks[i].track_id for i in track_indices])
             cost_matrix = self.metric.distance(features, targets)
             cost_matrix = linear_assignment.gate_cost_matrix(
@@ -138,10 +159,12 @@ class Tracker:
             return cost_matrix
 
         # Split track set into confirmed and unconfirmed tracks.
-        confirmed_tracks = [i for i, t in enumerate(self.tracks) if t.is_confirmed()]
-        unconfirmed_tracks = [
-            i for i, t in enumerate(self.tracks) if not t.is_confirmed()
-        ]
+        confirmed_tracks, unconfirmed_tracks = [], []
+        for i, t in enumerate(self.tracks):
+            if t.is_confirmed():
+                confirmed_tracks.append(i)
+            else:
+                unconfirmed_tracks.append(i)
 
         # Associate confirmed tracks using appearance features.
         (
@@ -188,22 +211,24 @@ class Tracker:
             track_id = "{}_{}".format(self.today, self._next_id)
         else:
             track_id = "{}".format(self._next_id)
-        self.tracks.append(
-            self.track_class(
-                mean,
-                covariance,
-                track_id,
-                self.n_init,
-                self.max_age,
-                # mean, covariance, self._next_id, self.n_init, self.max_age,
-                feature=detection.feature,
-                original_ltwh=detection.get_ltwh(),
-                det_class=detection.class_name,
-                det_conf=detection.confidence,
-                instance_mask=detection.instance_mask,
-                others=detection.others,
-            )
+        track = self.track_class(
+            mean,
+            covariance,
+            track_id,
+            self.n_init,
+            self.max_age,
+            # mean, covariance, self._next_id, self.n_init, self.max_age,
+            feature=detection.feature,
+            original_ltwh=detection.get_ltwh(),
+            det_class=detection.class_name,
+            det_conf=detection.confidence,
+            instance_mask=detection.instance_mask,
+            others=detection.others,
         )
+        # set after construction rather than passed to the constructor, so that
+        # track classes with their own `__init__` keep working
+        track.max_trajectory_len = self.max_trajectory_len
+        self.tracks.append(track)
         self._next_id += 1
 
     def delete_all_tracks(self):
@@ -7,6 +7,7 @@ import numpy as np
 
 from deep_sort_realtime.deep_sort import nn_matching
 from deep_sort_realtime.deep_sort.detection import Detection
+from deep_sort_realtime.deep_sort.track import DEFAULT_MAX_TRAJECTORY_LEN
 from deep_sort_realtime.deep_sort.tracker import Tracker
 from deep_sort_realtime.utils.nms import non_max_suppression
 
@@ -43,6 +44,7 @@ class DeepSort(object):
         embedder_wts=None,
         polygon=False,
         today=None,
+        max_trajectory_len=DEFAULT_MAX_TRAJECTORY_LEN,
     ):
         """
 
@@ -82,6 +84,8 @@ class DeepSort(object):
             Whether detections are polygons (e.g. oriented bounding boxes)
         today: Optional[datetime.date]
             Provide today's date, for naming of tracks. Argument for deep_sort_realtime.deep_sort.tracker.Tracker.
+        max_trajectory_len : Optional[int] = 64
+            Number of latest detection centers kept in each track's trajectory, at least 2. If None, whole trajectories are kept. Argument for deep_sort_realtime.deep_sort.tracker.Tracker.
         """
         self.nms_max_overlap = nms_max_overlap
         metric = nn_matching.NearestNeighborDistanceMetric(
@@ -95,6 +99,7 @@ class DeepSort(object):
             override_track_class=override_track_class,
             today=today,
             gating_only_position=gating_only_position,
+            max_trajectory_len=max_trajectory_len,
         )
 
         if embedder is not None:
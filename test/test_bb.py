@@ -161,7 +161,7 @@ class TestModule(unittest.TestCase):
             print(track.track_id)
             ltwh = track.to_ltwh()
             print(ltwh)
-            np.testing.assert_allclose(ltwh, ans)
+            np.testing.assert_allclose(ltwh, ans, rtol=1e-6)
 
         print()
         print("FRAME2")
@@ -182,7 +182,7 @@ class TestModule(unittest.TestCase):
             print(track.track_id)
             ltwh = track.to_ltwh()
             print(ltwh)
-            np.testing.assert_allclose(ltwh, ans)
+            np.testing.assert_allclose(ltwh, ans, rtol=1e-6)
 
         print()
         print("FRAME3")
@@ -203,7 +203,7 @@ class TestModule(unittest.TestCase):
             print(track.track_id)
             ltwh = track.to_ltwh()
             print(ltwh)
-            np.testing.assert_allclose(ltwh, ans)
+            np.testing.assert_allclose(ltwh, ans, rtol=1e-6)
 
         print()
         print("FRAME4")
@@ -233,7 +233,7 @@ class TestModule(unittest.TestCase):
 
             ltwh = track.to_ltwh()
             print(ltwh)
-            np.testing.assert_allclose(ltwh, ltwh_ans)
+            np.testing.assert_allclose(ltwh, ltwh_ans, rtol=1e-6)
 
             orig_ltwh = track.to_ltwh(orig=True)
             print(orig_ltwh)
@@ -0,0 +1,312 @@
+import unittest
+
+
+class TestTrack(unittest.TestCase):
+    def test_trajectory(self):
+
+        import numpy as np
+
+        from deep_sort_realtime.deep_sort.detection import Detection
+        from deep_sort_realtime.deep_sort.kalman_filter import KalmanFilter
+        from deep_sort_realtime.deep_sort.track import Track
+
+        kf = KalmanFilter()
+        det = Detection([0, 0, 10, 20], 0.9, [1.0, 0.0])
+        mean, covariance = kf.initiate(det.to_xyah())
+        track = Track(mean, covariance, "1", 3, 30, original_ltwh=det.get_ltwh())
+
+        centers = [[5.0, 10.0]]
+        for i in range(1, 100):
+            track.predict(kf)
+            track.update(kf, Detection([i, 2 * i, 10, 20], 0.9, [1.0, 0.0]))
+            centers.append([i + 5.0, 2 * i + 10.0])
+
+        # only the latest 64 centers are kept by default
+        np.testing.assert_allclose(track.get_trajectory(), centers[-64:])
+
+        avg_velocity, magnitude, direction = track.get_velocity(fps=1)
+        np.testing.assert_allclose(avg_velocity, np.sqrt(5), rtol=1e-6)
+        np.testing.assert_allclose(magnitude, np.full((63, 1), np.sqrt(5)), rtol=1e-6)
+        np.testing.assert_allclose(
+            direction, np.tile([1, 2] / np.sqrt(5), (63, 1)), rtol=1e-6
+        )
+        np.testing.assert_allclose(track.get_trajectory_slope(), 2.0, rtol=1e-6)
+
+        track = Track(
+            mean,
+            covariance,
+            "2",
+            3,
+            30,
+            original_ltwh=det.get_ltwh(),
+            max_trajectory_len=None,
+        )
+        for i in range(1, 100):
+            track.predict(kf)
+            track.update(kf, Detection([i, 2 * i, 10, 20], 0.9, [1.0, 0.0]))
+        np.testing.assert_allclose(track.get_trajectory(), centers)
+
+        track = Track(
+            mean,
+            covariance,
+            "3",
+            3,
+            30,
+            original_ltwh=det.get_ltwh(),
+            max_trajectory_len=2,
+        )
+        for i in range(1, 4):
+            track.predict(kf)
+            track.update(kf, Detection([i, 2 * i, 10, 20], 0.9, [1.0, 0.0]))
+        np.testing.assert_allclose(track.get_trajectory(), centers[2:4])
+        avg_velocity, _, _ = track.get_velocity(fps=1)
+        np.testing.assert_allclose(avg_velocity, np.sqrt(5), rtol=1e-6)
+
+        # changing the length keeps the latest centers
+        track = Track(
+            mean,
+            covariance,
+            "3",
+            3,
+            30,
+            original_ltwh=det.get_ltwh(),
+            max_trajectory_len=None,
+        )
+        for i in range(1, 4):
+            track.predict(kf)
+            track.update(kf, Detection([i, 2 * i, 10, 20], 0.9, [1.0, 0.0]))
+        track.max_trajectory_len = 2
+        np.testing.assert_allclose(track.get_trajectory(), centers[2:4])
+        with self.assertRaises(ValueError):
+            track.max_trajectory_len = 1
+
+        # assigning resets the trajectory, lists of centers included
+        track.trajectory = [[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]]
+        np.testing.assert_allclose(track.get_trajectory(), [[3, 4], [5, 6]])
+        track.trajectory = []
+        self.assertEqual(len(track.get_trajectory()), 0)
+        self.assertEqual(track.get_velocity(), (None, None, None))
+        track.predict(kf)
+        track.update(kf, Detection([1, 2, 10, 20], 0.9, [1.0, 0.0]))
+        track.predict(kf)
+        track.update(kf, Detection([2, 4, 10, 20], 0.9, [1.0, 0.0]))
+        np.testing.assert_allclose(track.get_trajectory(), centers[1:3])
+
+        for max_trajectory_len in (0, 1):
+            with self.assertRaises(ValueError):
+                Track(
+                    mean,
+                    covariance,
+                    "4",
+                    3,
+                    30,
+                    max_trajectory_len=max_trajectory_len,
+                )
+
+    def test_features(self):
+
+        import numpy as np
+
+        from deep_sort_realtime.deep_sort.detection import Detection
+        from deep_sort_realtime.deep_sort.kalman_filter import KalmanFilter
+        from deep_sort_realtime.deep_sort.track import Track
+
+        kf = KalmanFilter()
+        det = Detection([0, 0, 10, 20], 0.9, [0.0, 0.0])
+        mean, covariance = kf.initiate(det.to_xyah())
+        track = Track(mean, covariance, "1", 3, 30, feature=det.feature)
+
+        # grows past the initial capacity
+        for i in range(1, 20):
+            track.predict(kf)
+            track.update(kf, Detection([0, 0, 10, 20], 0.9, [i, -i]))
+            expected = [[j, -j] for j in range(i + 1)]
+            np.testing.assert_allclose(track.features, expected)
+        np.testing.assert_allclose(track.get_feature(), [19, -19])
+
+        track.features = []
+        self.assertEqual(len(track.features), 0)
+        track.predict(kf)
+        track.update(kf, Detection([0, 0, 10, 20], 0.9, [5, -5]))
+        np.testing.assert_allclose(track.features, [[5, -5]])
+
+    def test_predict_batch(self):
+
+        import numpy as np
+
+        from deep_sort_realtime.deep_sort.detection import Detection
+        from deep_sort_realtime.deep_sort.kalman_filter import KalmanFilter
+        from deep_sort_realtime.deep_sort.track import Track
+
+        kf = KalmanFilter()
+        tracks, expected = [], []
+        for i in range(5):
+            det = Detection([10 * i, 5 * i, 10 + i, 20 + i], 0.9, [1.0, 0.0])
+            mean, covariance = kf.initiate(det.to_xyah())
+            mean[4:] = [1.0, -1.0, 0.0, 0.5]
+            tracks.append(Track(mean, covariance, str(i), 3, 30))
+            expected.append(kf.predict(mean, covariance))
+
+        Track.predict_batch(tracks, kf)
+        for track, (mean, covariance) in zip(tracks, expected):
+            np.testing.assert_allclose(track.mean, mean)
+            np.testing.assert_allclose(track.covariance, covariance)
+            self.assertEqual(track.age, 2)
+            self.assertEqual(track.time_since_update, 1)
+
+    def test_batch_boxes(self):
+
+        import numpy as np
+
+        from deep_sort_realtime.deep_sort.detection import Detection
+        from deep_sort_realtime.deep_sort.kalman_filter import KalmanFilter
+        from deep_sort_realtime.deep_sort.track import (
+            Track,
+            batch_to_ltrb,
+            batch_to_ltwh,
+        )
+
+        kf = KalmanFilter()
+        tracks = []
+        for i in range(5):
+            det = Detection([10 * i, 5 * i, 10 + i, 20 + i], 0.9, [1.0, 0.0])
+            mean, covariance = kf.initiate(det.to_xyah())
+            tracks.append(Track(mean, covariance, str(i), 3, 30))
+
+        np.testing.assert_allclose(
+            batch_to_ltwh(tracks), [track.to_ltwh() for track in tracks]
+        )
+        np.testing.assert_allclose(
+            batch_to_ltrb(tracks), [track.to_ltrb() for track in tracks]
+        )
+        self.assertEqual(batch_to_ltrb([]).shape, (0, 4))
+
+    def test_override_track_class(self):
+
+        import numpy as np
+
+        from deep_sort_realtime.deepsort_tracker import DeepSort
+        from deep_sort_realtime.deep_sort.track import Track
+
+        class MyTrack(Track):
+            def __init__(
+                self,
+                mean,
+                covariance,
+                track_id,
+                n_init,
+                max_age,
+                feature=None,
+                original_ltwh=None,
+                det_class=None,
+                det_conf=None,
+                instance_mask=None,
+                others=None,
+            ):
+                super().__init__(
+                    mean,
+                    covariance,
+                    track_id,
+                    n_init,
+                    max_age,
+                    feature=feature,
+                    original_ltwh=original_ltwh,
+                    det_class=det_class,
+                    det_conf=det_conf,
+                    instance_mask=instance_mask,
+                    others=others,
+                )
+                self.custom = True
+
+        # the class does not take `max_trajectory_len`, it is set on its tracks
+        tracker = DeepSort(
+            nn_budget=2,
+            embedder=None,
+            override_track_class=MyTrack,
+            max_trajectory_len=3,
+        )
+        for i in range(5):
+            tracks = tracker.update_tracks(
+                [([10 + i, 10, 50, 50], 0.9, "person")], embeds=[np.array([1.0, 0.0])]
+            )
+        self.assertEqual(len(tracks), 1)
+        self.assertTrue(tracks[0].custom)
+        self.assertTrue(tracks[0].is_confirmed())
+        self.assertEqual(len(tracks[0].get_trajectory()), 3)
+
+    def test_tracker_max_trajectory_len(self):
+
+        import numpy as np
+
+        from deep_sort_realtime.deepsort_tracker import DeepSort
+        from deep_sort_realtime.deep_sort.track import Track
+
+        tracker = DeepSort(embedder=None, max_trajectory_len=None)
+        for i in range(100):
+            tracks = tracker.update_tracks(
+                [([i, 10, 50, 50], 0.9, "person")], embeds=[np.array([1.0, 0.0])]
+            )
+        self.assertEqual(len(tracks[0].get_trajectory()), 100)
+
+        with self.assertRaises(ValueError):
+            DeepSort(embedder=None, max_trajectory_len=1)
+
+        # added at the end of the signature, the other arguments keep their
+        # positions
+        tracker = DeepSort(0.7, 30, 3, 1.0, 0.2, None, False, Track, None)
+        self.assertIs(tracker.tracker.track_class, Track)
+        self.assertEqual(tracker.tracker.max_trajectory_len, 64)
+
+    def test_override_predict(self):
+
+        import numpy as np
+
+        from deep_sort_realtime.deep_sort import nn_matching
+        from deep_sort_realtime.deep_sort.detection import Detection
+        from deep_sort_realtime.deep_sort.track import Track
+        from deep_sort_realtime.deep_sort.tracker import Tracker
+
+        class MyTrack(Track):
+            def predict(self, kf):
+                # does not go through Track.predict
+                self.mean, self.covariance = kf.predict(self.mean, self.covariance)
+                self.age += 1
+                self.time_since_update += 1
+
+        frames = [[[10 * i, 10, 50, 50]] for i in range(4)]
+        # the track misses a frame while a distractor gets gated against it
+        frames.append([[600, 600, 50, 50]])
+        frames += [[[10 * i, 10, 50, 50]] for i in range(5, 8)]
+
+        boxes = []
+        for track_class in (Track, MyTrack):
+            metric = nn_matching.NearestNeighborDistanceMetric("cosine", 0.2)
+            tracker = Tracker(metric, override_track_class=track_class)
+            track_boxes = []
+            for frame in frames:
+                tracker.predict()
+                tracker.update([Detection(b, 0.9, [1.0, 0.0]) for b in frame])
+                track_boxes.append(tracker.tracks[0].to_ltwh())
+            boxes.append(track_boxes)
+
+        np.testing.assert_allclose(boxes[1], boxes[0], rtol=1e-5)
+
+    def test_velocity_backends(self):
+
+        import numpy as np
+
+        from deep_sort_realtime.deep_sort.track import _velocity_loop, _velocity_numpy
+
+        rng = np.random.default_rng(0)
+        trajectory = np.cumsum(rng.uniform(-5, 5, (64, 2)), axis=0).astype(np.float32)
+
+        expected = _velocity_numpy(trajectory, 5)
+        result = _velocity_loop(trajectory, 5)
+        self.assertIsInstance(expected[0], float)
+        self.assertIsInstance(result[0], float)
+        for res, exp in zip(result, expected):
+            np.testing.assert_allclose(res, exp, rtol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()